@@ -14,11 +14,15 @@ import os
 import json
 import logging
 import hashlib
-from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass
-from pathlib import Path
+import mmap
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Iterator, Optional, Tuple
+from dataclasses import dataclass, field
+from functools import partial
 import sqlite3
-from datetime import datetime
+import threading
+import time
 
 # Configure logging
 logging.basicConfig(
@@ -27,6 +31,105 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Database schema version, stored in PRAGMA user_version; bump it when the
+# FTS table definition changes or its contents need rebuilding so existing
+# databases are migrated. Version 2 rebuilds indexes left with entries for
+# replaced rows.
+SCHEMA_VERSION = 2
+
+# Maximum number of documents written per transaction
+STORE_BATCH_SIZE = 1000
+
+# Number of worker threads used to read and hash files while indexing
+INDEX_WORKERS = (os.cpu_count() or 1) * 2
+
+# Hashing reads files in 64 KiB chunks after an initial 4 KiB read; previews
+# keep the first 500 characters, so at most 2000 bytes (4 per UTF-8
+# character) are ever decoded
+HASH_CHUNK_BYTES = 1 << 16
+PREVIEW_READ_BYTES = 4096
+PREVIEW_CHARS = 500
+PREVIEW_DECODE_BYTES = PREVIEW_CHARS * 4
+
+# Files at least this large get a sequential read-ahead hint before hashing
+FADVISE_MIN_BYTES = 4 * HASH_CHUNK_BYTES
+
+# Files larger than this are hashed from a memory mapping
+MMAP_THRESHOLD_BYTES = 1 << 20
+
+# With pretty_json enabled, JSON files smaller than this are pretty-printed
+# for their preview
+JSON_PRETTY_PRINT_LIMIT = 1 << 20
+
+# Connection settings: WAL journaling with relaxed fsync, in-memory temp
+# storage, a 64 MiB page cache and 256 MiB of memory-mapped I/O
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+)
+
+# Statements are kept as module constants so each one is parsed once and
+# then served from the connection's prepared-statement cache
+STORE_FILE_SQL = """
+    INSERT OR REPLACE INTO files
+    (path, name, size, modified_at, content_hash, content_preview, file_type)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+STORE_FTS_SQL = """
+    INSERT INTO files_fts (rowid, name, content_preview)
+    VALUES (?, ?, ?)
+"""
+
+# files_fts is an external-content table, so entries for a row that is about
+# to be replaced must be removed explicitly using the row's current values
+DELETE_FTS_SQL = """
+    INSERT INTO files_fts (files_fts, rowid, name, content_preview)
+    SELECT 'delete', id, name, content_preview FROM files WHERE path = ?
+"""
+
+LAST_FILE_ID_SQL = "SELECT seq FROM sqlite_sequence WHERE name = 'files'"
+
+# Search is driven by the FTS index and looks up each hit in files by rowid
+SEARCH_SQL = """
+    SELECT files_fts.rowid AS id, f.path, f.name, f.size, f.modified_at,
+           f.content_preview, f.file_type,
+           highlight(files_fts, 0, '<mark>', '</mark>') as highlighted_name,
+           highlight(files_fts, 1, '<mark>', '</mark>') as highlighted_content
+    FROM files_fts
+    JOIN files f ON f.id = files_fts.rowid
+    WHERE files_fts MATCH ?
+    ORDER BY rank
+    LIMIT ?
+"""
+
+# Per-type counts and sizes; overall totals are summed from these rows
+STATS_SQL = """
+    SELECT file_type, COUNT(*) AS file_count, SUM(size) AS total_size
+    FROM files
+    GROUP BY file_type
+    ORDER BY file_count DESC
+"""
+
+# Flat document record in STORE_FILE_SQL column order:
+# (path, name, size, modified_at, content_hash, content_preview, file_type)
+DocumentRow = Tuple[str, str, int, str, str, str, str]
+
+
+def _format_mtime(mtime_ns: int) -> str:
+    """Format a modification time in nanoseconds as a local ISO 8601 timestamp."""
+    seconds, nanos = divmod(mtime_ns, 1_000_000_000)
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(seconds)) + f".{nanos // 1000:06d}"
+
+
+def _read_json(path: str) -> str:
+    """Read a JSON file and return it pretty-printed."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.dumps(json.load(f), indent=2)
+
 
 @dataclass
 class DocumentInfo:
@@ -35,7 +138,7 @@ class DocumentInfo:
     path: str
     name: str
     size: int
-    modified_at: datetime
+    modified_at: str
     content_hash: str
     content_preview: str
     file_type: str
@@ -47,30 +150,103 @@ class DocumentInfo:
             'path': self.path,
             'name': self.name,
             'size': self.size,
-            'modified_at': self.modified_at.isoformat(),
+            'modified_at': self.modified_at,
             'content_hash': self.content_hash,
             'content_preview': self.content_preview,
             'file_type': self.file_type
         }
 
 
+@dataclass
+class DocumentBatch:
+    """Column-oriented batch of processed documents awaiting storage."""
+    ids: List[Optional[int]] = field(default_factory=list)
+    paths: List[str] = field(default_factory=list)
+    names: List[str] = field(default_factory=list)
+    sizes: List[int] = field(default_factory=list)
+    modified_ats: List[str] = field(default_factory=list)
+    content_hashes: List[str] = field(default_factory=list)
+    content_previews: List[str] = field(default_factory=list)
+    file_types: List[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def append(self, row: DocumentRow) -> None:
+        """Append a single document row to the batch."""
+        path, name, size, modified_at, content_hash, content_preview, file_type = row
+        self.ids.append(None)
+        self.paths.append(path)
+        self.names.append(name)
+        self.sizes.append(size)
+        self.modified_ats.append(modified_at)
+        self.content_hashes.append(content_hash)
+        self.content_previews.append(content_preview)
+        self.file_types.append(file_type)
+
+    def rows(self) -> Iterator[DocumentRow]:
+        """Iterate over the batch as rows in STORE_FILE_SQL column order."""
+        return zip(
+            self.paths, self.names, self.sizes, self.modified_ats,
+            self.content_hashes, self.content_previews, self.file_types
+        )
+
+    def documents(self) -> List[DocumentInfo]:
+        """Build DocumentInfo views of the batch for the public API."""
+        return [DocumentInfo(doc_id, *row) for doc_id, row in zip(self.ids, self.rows())]
+
+
 class DocumentProcessor:
     """Main class for processing documents and managing the search index."""
 
-    def __init__(self, db_path: str = "tecgpt.db"):
-        """Initialize the document processor with database connection."""
+    def __init__(self, db_path: str = "tecgpt.db", pretty_json: bool = False):
+        """
+        Initialize the document processor with database connection.
+
+        Args:
+            db_path: Path to the SQLite database file
+            pretty_json: Whether previews of small JSON files are pretty-printed;
+                by default the raw file text is used
+        """
         self.db_path = db_path
-        self.supported_extensions = {
+        self.pretty_json = pretty_json
+        self.supported_extensions = frozenset({
             '.txt', '.md', '.py', '.js', '.ts', '.json', '.yaml', '.yml',
             '.csv', '.xml', '.html', '.css', '.sql', '.sh', '.bat'
-        }
+        })
+        self._lock = threading.Lock()
+        self._conn = self._connect()
         self._setup_database()
 
+    def __enter__(self) -> "DocumentProcessor":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open the shared database connection with the performance PRAGMAs applied.
+
+        The connection runs in autocommit mode; writers manage their own
+        transactions explicitly. Access is serialized through ``self._lock``.
+        """
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
     def _setup_database(self) -> None:
         """Initialize the database schema for document storage."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            with self._lock:
+                cursor = self._conn.cursor()
 
                 # Create main files table
                 cursor.execute("""
@@ -87,104 +263,174 @@ class DocumentProcessor:
                     )
                 """)
 
-                # Create FTS5 virtual table for full-text search
+                # Covering index so statistics are grouped without reading rows
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_files_type ON files(file_type, size)")
+
+                # Drop an FTS table created by an older schema so it is rebuilt
+                # with the current tokenizer and prefix settings
+                cursor.execute("PRAGMA user_version")
+                schema_version = cursor.fetchone()[0]
+                if schema_version < SCHEMA_VERSION:
+                    cursor.execute("DROP TABLE IF EXISTS files_fts")
+
+                # Create FTS5 virtual table for full-text search, folding
+                # diacritics and keeping prefix indexes for term* queries
                 cursor.execute("""
                     CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(
-                        name, content_preview, content='files', content_rowid='id'
+                        name, content_preview,
+                        content='files', content_rowid='id',
+                        tokenize='unicode61 remove_diacritics 2',
+                        prefix='2 3 4'
                     )
                 """)
 
-                conn.commit()
+                if schema_version < SCHEMA_VERSION:
+                    cursor.execute("INSERT INTO files_fts(files_fts) VALUES('rebuild')")
+                    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
                 logger.info("Database initialized successfully")
 
         except sqlite3.Error as e:
             logger.error(f"Database setup failed: {e}")
             raise
 
-    def process_file(self, file_path: str) -> Optional[DocumentInfo]:
+    def process_file(
+        self,
+        file_path: str,
+        known_files: Optional[Dict[str, Tuple[int, str]]] = None
+    ) -> Optional[DocumentInfo]:
         """
         Process a single file and extract its metadata and content.
 
         Args:
             file_path: Path to the file to process
+            known_files: Optional mapping of indexed paths to (size, modified_at);
+                files whose size and modification time match are skipped
 
         Returns:
-            DocumentInfo object if successful, None if failed
+            DocumentInfo object if successful, None if failed or unchanged
         """
-        try:
-            path_obj = Path(file_path)
+        row = self._scan_file(file_path, known_files)
+        return DocumentInfo(None, *row) if row else None
+
+    def _scan_file(
+        self,
+        file_path: str,
+        known_files: Optional[Dict[str, Tuple[int, str]]] = None
+    ) -> Optional[DocumentRow]:
+        """
+        Process a single file into a flat row of its metadata and content.
 
-            if not path_obj.exists():
-                logger.warning(f"File not found: {file_path}")
-                return None
+        Args:
+            file_path: Path to the file to process
+            known_files: Optional mapping of indexed paths to (size, modified_at)
 
-            if path_obj.suffix.lower() not in self.supported_extensions:
+        Returns:
+            DocumentRow tuple if successful, None if failed or unchanged
+        """
+        try:
+            # Check the extension first; it needs no I/O
+            file_type = os.path.splitext(file_path)[1].lower()
+            if file_type not in self.supported_extensions:
                 logger.debug(f"Unsupported file type: {file_path}")
                 return None
 
             # Get file statistics
-            stat = path_obj.stat()
-            modified_at = datetime.fromtimestamp(stat.st_mtime)
-
-            # Extract content and generate hash
-            content = self._extract_content(path_obj)
-            content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
-
-            # Create preview (first 500 characters)
-            content_preview = content[:500] + "..." if len(content) > 500 else content
-
-            doc_info = DocumentInfo(
-                id=None,
-                path=str(path_obj.absolute()),
-                name=path_obj.name,
-                size=stat.st_size,
-                modified_at=modified_at,
-                content_hash=content_hash,
-                content_preview=content_preview,
-                file_type=path_obj.suffix.lower()
-            )
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
+                logger.warning(f"File not found: {file_path}")
+                return None
 
-            logger.info(f"Successfully processed file: {path_obj.name}")
-            return doc_info
+            modified_at = _format_mtime(stat.st_mtime_ns)
+            abs_path = os.path.abspath(file_path)
+
+            # Skip hashing when the file is unchanged since the last run
+            if known_files is not None:
+                if known_files.get(abs_path) == (stat.st_size, modified_at):
+                    logger.debug(f"Unchanged file: {file_path}")
+                    return None
+
+            # Hash the raw bytes and build the preview from the head of the file
+            content_hash, content_preview = self._hash_and_preview(file_path, stat.st_size)
+
+            # Optionally pretty-print the preview of small JSON files
+            if self.pretty_json and file_type == '.json' and stat.st_size < JSON_PRETTY_PRINT_LIMIT:
+                # Malformed files keep the raw preview
+                content = self._pretty_json(file_path)
+                if content is not None:
+                    content_preview = content[:PREVIEW_CHARS] + "..." if len(content) > PREVIEW_CHARS else content
+
+            name = os.path.basename(file_path)
+            logger.info(f"Successfully processed file: {name}")
+            return (
+                abs_path, name, stat.st_size, modified_at,
+                content_hash, content_preview, file_type
+            )
 
         except Exception as e:
             logger.error(f"Failed to process file {file_path}: {e}")
             return None
 
-    def _extract_content(self, path: Path) -> str:
+    def _hash_and_preview(self, path: str, size: int) -> Tuple[str, str]:
         """
-        Extract text content from a file based on its type.
+        Hash a file without loading it whole and decode only its head for the preview.
+
+        Files larger than MMAP_THRESHOLD_BYTES are hashed straight from a
+        memory mapping; smaller ones are read in fixed-size chunks.
 
         Args:
-            path: Path object for the file
+            path: Path to the file
+            size: File size in bytes, as reported by stat
 
         Returns:
-            Extracted text content
+            Tuple of (SHA-256 hex digest, content preview)
+        """
+        if size > MMAP_THRESHOLD_BYTES:
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                sha256 = hashlib.sha256(mm)
+                head = mm[:PREVIEW_READ_BYTES]
+
+        else:
+            with open(path, 'rb', buffering=0) as f:
+                head = f.read(PREVIEW_READ_BYTES)
+                sha256 = hashlib.sha256(head)
+
+                # A short first read means the whole file is already in hand
+                if len(head) == PREVIEW_READ_BYTES:
+                    # Let the kernel read ahead aggressively for the rest of
+                    # files large enough for the hint to pay for its syscall
+                    if size >= FADVISE_MIN_BYTES and hasattr(os, 'posix_fadvise'):
+                        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                    while chunk := f.read(HASH_CHUNK_BYTES):
+                        sha256.update(chunk)
+
+        # Decode only as many bytes as the preview can need
+        text = head[:PREVIEW_DECODE_BYTES].decode('utf-8', errors='ignore')
+        if len(text) > PREVIEW_CHARS or len(head) > PREVIEW_DECODE_BYTES:
+            preview = text[:PREVIEW_CHARS] + "..."
+        else:
+            preview = text
+        return sha256.hexdigest(), preview
+
+    def _pretty_json(self, path: str) -> Optional[str]:
+        """
+        Read a JSON file and pretty-print it for the preview.
+
+        Args:
+            path: Path to the JSON file
+
+        Returns:
+            Pretty-printed JSON text, or None if the file could not be parsed
         """
         try:
-            # Handle different file types
-            if path.suffix.lower() in ['.txt', '.md', '.py', '.js', '.ts', '.css', '.sql', '.sh', '.bat']:
-                with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                    return f.read()
-
-            elif path.suffix.lower() in ['.json']:
-                with open(path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return json.dumps(data, indent=2)
-
-            elif path.suffix.lower() in ['.yaml', '.yml']:
-                # For simplicity, treat YAML as text
-                with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                    return f.read()
-
-            else:
-                logger.warning(f"No specific handler for file type: {path.suffix}")
-                with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                    return f.read()
+            return _read_json(path)
 
         except Exception as e:
-            logger.error(f"Content extraction failed for {path}: {e}")
-            return ""
+            logger.warning(f"Cannot pretty-print JSON file {path}: {e}")
+            return None
 
     def index_directory(self, directory_path: str, recursive: bool = True) -> List[DocumentInfo]:
         """
@@ -195,61 +441,137 @@ class DocumentProcessor:
             recursive: Whether to index subdirectories
 
         Returns:
-            List of processed DocumentInfo objects
+            List of DocumentInfo objects for new or changed files
         """
-        processed_files = []
-        directory = Path(directory_path)
-
-        if not directory.exists() or not directory.is_dir():
+        if not os.path.isdir(directory_path):
             logger.error(f"Invalid directory: {directory_path}")
-            return processed_files
-
-        # Get file pattern based on recursive flag
-        pattern = "**/*" if recursive else "*"
+            return []
 
         logger.info(f"Starting indexing of directory: {directory_path}")
 
-        for file_path in directory.glob(pattern):
-            if file_path.is_file():
-                doc_info = self.process_file(str(file_path))
-                if doc_info:
-                    processed_files.append(doc_info)
-                    self._store_document(doc_info)
+        # Read and hash files concurrently; database writes stay on this thread
+        file_paths = list(self._iter_files(directory_path, recursive))
+        scan = partial(self._scan_file, known_files=self._load_known_files())
+        processed_files = []
+        batch = DocumentBatch()
+        with ThreadPoolExecutor(max_workers=INDEX_WORKERS) as executor:
+            for row in executor.map(scan, file_paths):
+                if row:
+                    batch.append(row)
+
+                # Store in batches, one transaction per batch
+                if len(batch) >= STORE_BATCH_SIZE:
+                    self._store_documents(batch)
+                    processed_files.extend(batch.documents())
+                    batch = DocumentBatch()
+
+        self._store_documents(batch)
+        processed_files.extend(batch.documents())
+
+        # Fully merging the FTS index rewrites all of it, so only do it after
+        # bulk runs; FTS5's automerge keeps small incremental updates in shape
+        stored_count = sum(1 for doc_info in processed_files if doc_info.id is not None)
+        if stored_count >= STORE_BATCH_SIZE:
+            self._optimize_index()
 
         logger.info(f"Indexed {len(processed_files)} files from {directory_path}")
         return processed_files
 
-    def _store_document(self, doc_info: DocumentInfo) -> None:
-        """Store document information in the database."""
+    def _load_known_files(self) -> Dict[str, Tuple[int, str]]:
+        """Load the size and modification time of every indexed file, keyed by path."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            with self._lock:
+                cursor = self._conn.cursor()
+                cursor.execute("SELECT path, size, modified_at FROM files")
+                return {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
 
-                # Insert or update file record
-                cursor.execute("""
-                    INSERT OR REPLACE INTO files
-                    (path, name, size, modified_at, content_hash, content_preview, file_type)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    doc_info.path,
-                    doc_info.name,
-                    doc_info.size,
-                    doc_info.modified_at.isoformat(),
-                    doc_info.content_hash,
-                    doc_info.content_preview,
-                    doc_info.file_type
-                ))
-
-                # Update FTS index
-                cursor.execute("""
-                    INSERT OR REPLACE INTO files_fts (rowid, name, content_preview)
-                    SELECT id, name, content_preview FROM files WHERE path = ?
-                """, (doc_info.path,))
+        except sqlite3.Error as e:
+            logger.error(f"Failed to load indexed files: {e}")
+            return {}
+
+    def _iter_files(self, root: str, recursive: bool) -> Iterator[str]:
+        """
+        Walk a directory and yield the paths of files with supported extensions.
+
+        Args:
+            root: Directory to walk
+            recursive: Whether to descend into subdirectories
+
+        Yields:
+            Path strings of candidate files
+        """
+        pending = deque([root])
+
+        while pending:
+            current = pending.popleft()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                pending.append(entry.path)
+                            continue
+
+                        # Reject by extension before touching file metadata
+                        if os.path.splitext(entry.name)[1].lower() not in self.supported_extensions:
+                            continue
+
+                        # Symlinked files are indexed; symlinked directories are
+                        # not followed above, which rules out cycles
+                        if entry.is_file():
+                            yield entry.path
+
+            except OSError as e:
+                logger.warning(f"Cannot scan directory {current}: {e}")
+
+    def _store_documents(self, batch: DocumentBatch) -> None:
+        """
+        Store a batch of documents in the database using a single transaction.
+
+        The ids assigned by the database are written back to ``batch.ids``.
+
+        Args:
+            batch: Column-oriented batch of documents to insert or update
+        """
+        if not batch:
+            return
+
+        with self._lock:
+            cursor = self._conn.cursor()
+            try:
+                cursor.execute("BEGIN")
+
+                # Drop the FTS entries of files that are about to be replaced
+                cursor.executemany(DELETE_FTS_SQL, ((path,) for path in batch.paths))
+
+                # Insert or update file records in one prepared statement
+                cursor.executemany(STORE_FILE_SQL, batch.rows())
 
-                conn.commit()
+                # AUTOINCREMENT hands out consecutive ids within this write
+                # transaction, so the batch's ids end at the current sequence
+                cursor.execute(LAST_FILE_ID_SQL)
+                last_id = cursor.fetchone()[0]
+                ids = list(range(last_id - len(batch) + 1, last_id + 1))
+
+                # Update FTS index directly with the known rowids
+                cursor.executemany(STORE_FTS_SQL, zip(ids, batch.names, batch.content_previews))
+
+                cursor.execute("COMMIT")
+                batch.ids = ids
+
+            except sqlite3.Error as e:
+                if self._conn.in_transaction:
+                    self._conn.rollback()
+                logger.error(f"Failed to store {len(batch)} documents: {e}")
+
+    def _optimize_index(self) -> None:
+        """Merge the FTS index segments after a bulk update."""
+        try:
+            with self._lock:
+                self._conn.execute("INSERT INTO files_fts(files_fts) VALUES('optimize')")
 
         except sqlite3.Error as e:
-            logger.error(f"Failed to store document {doc_info.name}: {e}")
+            logger.error(f"Failed to optimize search index: {e}")
 
     def search_documents(self, query: str, limit: int = 20) -> List[Dict]:
         """
@@ -263,35 +585,13 @@ class DocumentProcessor:
             List of matching documents
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            with self._lock:
+                cursor = self._conn.cursor()
 
-                # Perform FTS search
-                cursor.execute("""
-                    SELECT f.id, f.path, f.name, f.size, f.modified_at,
-                           f.content_preview, f.file_type,
-                           highlight(files_fts, 0, '<mark>', '</mark>') as highlighted_name,
-                           highlight(files_fts, 1, '<mark>', '</mark>') as highlighted_content
-                    FROM files f
-                    JOIN files_fts ON f.id = files_fts.rowid
-                    WHERE files_fts MATCH ?
-                    ORDER BY rank
-                    LIMIT ?
-                """, (query, limit))
-
-                results = []
-                for row in cursor.fetchall():
-                    results.append({
-                        'id': row[0],
-                        'path': row[1],
-                        'name': row[2],
-                        'size': row[3],
-                        'modified_at': row[4],
-                        'content_preview': row[5],
-                        'file_type': row[6],
-                        'highlighted_name': row[7],
-                        'highlighted_content': row[8]
-                    })
+                # Perform FTS search; the SQL LIMIT already bounds the result
+                cursor.execute(SEARCH_SQL, (query, limit))
+
+                results = [dict(row) for row in cursor.fetchall()]
 
                 logger.info(f"Search for '{query}' returned {len(results)} results")
                 return results
@@ -303,24 +603,16 @@ class DocumentProcessor:
     def get_file_statistics(self) -> Dict[str, int]:
         """Get statistics about indexed files."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            with self._lock:
+                cursor = self._conn.cursor()
 
-                cursor.execute("SELECT COUNT(*), SUM(size) FROM files")
-                total_files, total_size = cursor.fetchone()
-
-                cursor.execute("""
-                    SELECT file_type, COUNT(*)
-                    FROM files
-                    GROUP BY file_type
-                    ORDER BY COUNT(*) DESC
-                """)
-                file_types = dict(cursor.fetchall())
+                cursor.execute(STATS_SQL)
+                rows = cursor.fetchall()
 
                 return {
-                    'total_files': total_files or 0,
-                    'total_size': total_size or 0,
-                    'file_types': file_types
+                    'total_files': sum(row['file_count'] for row in rows),
+                    'total_size': sum(row['total_size'] for row in rows),
+                    'file_types': {row['file_type']: row['file_count'] for row in rows}
                 }
 
         except sqlite3.Error as e:
@@ -330,22 +622,21 @@ class DocumentProcessor:
 
 def main():
     """Example usage of the DocumentProcessor class."""
-    processor = DocumentProcessor()
-
-    # Example: Index current directory
-    current_dir = os.getcwd()
-    print(f"Indexing files in: {current_dir}")
+    with DocumentProcessor() as processor:
+        # Example: Index current directory
+        current_dir = os.getcwd()
+        print(f"Indexing files in: {current_dir}")
 
-    processed_files = processor.index_directory(current_dir, recursive=False)
-    print(f"Processed {len(processed_files)} files")
+        processed_files = processor.index_directory(current_dir, recursive=False)
+        print(f"Processed {len(processed_files)} files")
 
-    # Example: Search for documents
-    search_results = processor.search_documents("python OR function")
-    print(f"Found {len(search_results)} documents matching search")
+        # Example: Search for documents
+        search_results = processor.search_documents("python OR function")
+        print(f"Found {len(search_results)} documents matching search")
 
-    # Display statistics
-    stats = processor.get_file_statistics()
-    print(f"Database statistics: {stats}")
+        # Display statistics
+        stats = processor.get_file_statistics()
+        print(f"Database statistics: {stats}")
 
 
 if __name__ == "__main__":